@@ -0,0 +1,5 @@
+"""
+Offline benchmarks for the ReadNext recommendation engine.
+
+Run `python -m benchmark --help` from the repository root.
+"""
@@ -0,0 +1,92 @@
+import argparse
+import json
+import sys
+
+from benchmark import loadtest, run
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmark", description="ReadNext benchmarks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="time the retrieval paths on synthetic catalogs")
+    run_parser.add_argument("--sizes", type=int, nargs="+", default=run.DEFAULT_SIZES,
+                            help="catalog sizes in rows (default: 10000 100000 1000000)")
+    run_parser.add_argument("--queries", type=int, default=100, help="timed queries per path")
+    run_parser.add_argument("--warmup", type=int, default=3, help="untimed queries per path")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--artifact-dir", default=run.DEFAULT_ARTIFACT_DIR)
+    run_parser.add_argument("--rebuild", action="store_true", help="regenerate cached artifacts")
+    run_parser.add_argument("--output", help="JSON report path (default: benchmark/results/)")
+
+    compare_parser = subparsers.add_parser("compare", help="compare two JSON reports")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("head")
+    compare_parser.add_argument("--threshold", type=float, default=0.10,
+                                help="relative slowdown counted as a regression (default: 0.10)")
+
+    load_parser = subparsers.add_parser("loadtest", help="replay concurrent sessions against the app code")
+    load_parser.add_argument("--rows", type=int, default=10000, help="synthetic catalog size")
+    load_parser.add_argument("--sessions", type=int, default=200, help="sessions in a generated trace")
+    load_parser.add_argument("--processes", type=int, default=1)
+    load_parser.add_argument("--threads", type=int, default=8, help="threads per process")
+    load_parser.add_argument("--seed", type=int, default=0)
+    load_parser.add_argument("--trace", help="replay this JSONL trace instead of generating one")
+    load_parser.add_argument("--hot-queries", type=int, default=20,
+                             help="popular searches repeated across sessions (0 disables the skew)")
+    load_parser.add_argument("--hot-share", type=float, default=0.8, help="share of sessions that are popular searches")
+    load_parser.add_argument("--filter-rate", type=float, default=0.5,
+                             help="chance of each filter (category, year range) per session")
+    load_parser.add_argument("--save-trace", help="write the replayed trace to this JSONL file")
+    load_parser.add_argument("--latency", type=float, default=0.05, help="stub image latency in seconds")
+    load_parser.add_argument("--jitter", type=float, default=0.02, help="+/- latency jitter in seconds")
+    load_parser.add_argument("--failure-rate", type=float, default=0.05, help="share of requests answered 503")
+    load_parser.add_argument("--broken-rate", type=float, default=0.1, help="share of URLs serving a 1x1 image")
+    load_parser.add_argument("--invalid-rate", type=float, default=0.02, help="share of URLs serving non-images")
+    load_parser.add_argument("--artifact-dir", default=run.DEFAULT_ARTIFACT_DIR)
+    load_parser.add_argument("--output", help="JSON report path (default: benchmark/results/)")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        report = run.run_benchmarks(
+            sizes=args.sizes, n_queries=args.queries, warmup=args.warmup,
+            seed=args.seed, artifact_dir=args.artifact_dir, rebuild=args.rebuild,
+        )
+        print(run.format_report(report))
+        print(f"Saved report to {run.save_report(report, args.output)}")
+        return 0
+
+    if args.command == "loadtest":
+        trace = loadtest.load_trace(args.trace) if args.trace else None
+        report = loadtest.run_loadtest(
+            n_rows=args.rows, n_sessions=args.sessions, n_processes=args.processes,
+            n_threads=args.threads, seed=args.seed, trace=trace,
+            hot_queries=args.hot_queries, hot_share=args.hot_share, filter_rate=args.filter_rate,
+            latency=args.latency, jitter=args.jitter, failure_rate=args.failure_rate,
+            broken_rate=args.broken_rate, invalid_rate=args.invalid_rate,
+            artifact_dir=args.artifact_dir, trace_output=args.save_trace,
+        )
+        print(loadtest.format_report(report))
+        print(f"Saved report to {run.save_report(report, args.output, prefix='loadtest_')}")
+        return 0
+
+    if args.command == "compare":
+        with open(args.base) as f:
+            base = json.load(f)
+        with open(args.head) as f:
+            head = json.load(f)
+        try:
+            rows = run.compare_reports(base, head, threshold=args.threshold)
+        except ValueError as e:
+            print(f"Cannot compare: {e}", file=sys.stderr)
+            return 2
+        for row in rows:
+            flag = "  REGRESSION" if row['regression'] else ""
+            print(f"{row['n_rows']:>8} {row['metric']:<45} {row['base']:>10} -> {row['head']:>10} "
+                  f"({row['change']:+.1%}){flag}")
+        return 1 if any(row['regression'] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
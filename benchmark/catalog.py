@@ -0,0 +1,343 @@
+import os
+import pickle
+import re
+
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+
+# Bump whenever generate_catalog or build_model_artifacts produce different
+# output. Cached artifacts and benchmark reports are keyed on it, so stale
+# pickles are rebuilt and reports from different catalogs are not compared.
+CATALOG_VERSION = 2
+
+# A full cosine similarity matrix needs n*n*8 bytes (80 GB at 100k books),
+# so above this size the rows are computed on demand instead.
+DENSE_COSINE_MAX_ROWS = 20000
+
+IMAGE_BASE_URL = "http://covers.invalid"
+
+CATEGORIES = [
+    "Fiction", "Juvenile Fiction", "Biography & Autobiography", "History",
+    "Religion", "Juvenile Nonfiction", "Social Science", "Business & Economics",
+    "Body, Mind & Spirit", "Cooking", "Health & Fitness", "Family & Relationships",
+    "Self-Help", "Humor", "Travel", "Psychology", "Poetry", "Science",
+    "Political Science", "Philosophy", "Computers", "Art", "Drama", "Nature",
+    "True Crime", "Sports & Recreation", "Literary Criticism", "Music",
+    "Reference", "Education",
+]
+
+FIRST_NAMES = [
+    "James", "Mary", "John", "Patricia", "Robert", "Jennifer", "Michael", "Linda",
+    "William", "Elizabeth", "David", "Barbara", "Richard", "Susan", "Joseph",
+    "Jessica", "Thomas", "Sarah", "Charles", "Karen", "Daniel", "Nancy", "Matthew",
+    "Lisa", "Anthony", "Margaret", "Mark", "Sandra", "Paul", "Ashley", "Steven",
+    "Emily", "Andrew", "Donna", "Kenneth", "Michelle", "George", "Carol", "Edward",
+    "Amanda", "Dorothy", "Peter", "Helen", "Anne", "Agatha",
+    "Nora", "Dean", "Danielle", "Terry", "Isaac", "Ursula", "Arthur", "Virginia",
+    "Alice", "Benjamin", "Catherine", "Diana", "Eleanor", "Frances", "Gregory",
+    "Harold", "Irene", "Jack", "Julia", "Katherine", "Laura", "Louise", "Martha",
+    "Neil", "Oliver", "Philip", "Rachel", "Rose", "Samuel", "Simon", "Teresa",
+    "Victor", "Walter", "Zadie", "Toni", "Kazuo", "Haruki", "Chimamanda",
+]
+
+LAST_NAMES = [
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis",
+    "Rodriguez", "Martinez", "Hernandez", "Lopez", "Gonzalez", "Wilson", "Anderson",
+    "Thomas", "Taylor", "Moore", "Jackson", "Martin", "Lee", "Perez", "Thompson",
+    "White", "Harris", "Sanchez", "Clark", "Ramirez", "Lewis", "Robinson", "Walker",
+    "Young", "Allen", "King", "Wright", "Scott", "Torres", "Nguyen", "Hill",
+    "Flores", "Green", "Adams", "Nelson", "Baker", "Hall", "Rivera", "Campbell",
+    "Mitchell", "Carter", "Roberts", "Christie", "Koontz", "Steel", "Pratchett",
+    "Asimov", "Le Guin", "Woolf", "Grisham", "Crichton",
+    "Atwood", "Austen", "Baldwin", "Bennett", "Brooks", "Burke", "Chandler",
+    "Cooper", "Dickens", "Doyle", "Ellis", "Evans", "Fisher", "Foster", "Gibson",
+    "Graham", "Gray", "Hardy", "Hayes", "Hughes", "Irving", "James", "Kelly",
+    "Kennedy", "Lawrence", "Marsh", "Morrison", "Murphy", "Murray", "Parker",
+    "Porter", "Powell", "Reed", "Russell", "Sayers", "Shaw", "Spencer", "Stewart",
+    "Sullivan", "Turner", "Wallace", "Ward", "Watson", "Webb", "Wells", "Wood",
+]
+
+INITIALS = list("ABCDEFGHJKLMNOPRSTW")
+
+# Books per author follow a lognormal: most authors have one to three
+# books and the most prolific few dozen, capped at a few hundred.
+BOOKS_PER_AUTHOR_MU = 0.7
+BOOKS_PER_AUTHOR_SIGMA = 0.9
+MAX_BOOKS_PER_AUTHOR = 300
+
+TITLE_ADJECTIVES = [
+    "Silent", "Broken", "Hidden", "Last", "Lost", "Dark", "Golden", "Secret",
+    "Forgotten", "Burning", "Distant", "Wild", "Quiet", "Crimson", "Endless",
+    "Little", "Final", "Shattered", "Midnight", "Winter", "Summer", "Stolen",
+    "Perfect", "Savage", "Gentle", "Hollow", "Bitter", "Fallen", "Iron", "Glass",
+]
+
+TITLE_NOUNS = [
+    "House", "River", "Garden", "Night", "Kingdom", "Promise", "Shadow", "Road",
+    "Storm", "Heart", "Mirror", "Island", "Letter", "Empire", "Witness", "Journey",
+    "Sea", "Crown", "Daughter", "Son", "Mountain", "Fire", "Wolf", "Secret",
+    "Memory", "City", "Season", "Voyage", "Country", "Moon", "Stranger", "Bridge",
+    "Door", "Song", "Game", "War", "Code", "Truth", "Map", "Tide",
+]
+
+# Words each category favours in its summaries, so TF-IDF neighbours cluster
+# by genre the way they do in the real dataset.
+CATEGORY_VOCABULARY = {
+    "Fiction": "love family secret past town woman man life story discover",
+    "Juvenile Fiction": "boy girl friend school adventure magic dog summer learn",
+    "Biography & Autobiography": "life career memoir childhood born famous legacy",
+    "History": "war century empire revolution battle nation ancient history",
+    "Religion": "faith god church prayer spiritual bible belief grace",
+    "Juvenile Nonfiction": "kid learn fact animal science fun activity world",
+    "Social Science": "society culture community gender class study research",
+    "Business & Economics": "business market money company management strategy",
+    "Body, Mind & Spirit": "energy healing meditation soul inner spirit power",
+    "Cooking": "recipe kitchen dish food flavor cook ingredient meal",
+    "Health & Fitness": "health diet exercise weight body fitness nutrition",
+    "Family & Relationships": "parent child marriage relationship family advice",
+    "Self-Help": "success habit goal change confidence happiness life",
+    "Humor": "funny joke hilarious laugh comic satire wit",
+    "Travel": "travel journey guide country city road trip culture",
+    "Psychology": "mind behavior brain emotion therapy mental research",
+    "Poetry": "poem verse collection poet voice image language",
+    "Science": "scientist universe theory physics discovery evolution nature",
+    "Political Science": "government politics policy power election democracy",
+    "Philosophy": "philosophy truth ethic reason moral thinker idea",
+    "Computers": "software computer program data network code system",
+    "Art": "art painting artist design museum color work",
+    "Drama": "play stage theatre act character scene drama",
+    "Nature": "nature wildlife forest bird animal landscape season",
+    "True Crime": "murder crime killer police investigation trial victim",
+    "Sports & Recreation": "game team player season coach sport championship",
+    "Literary Criticism": "novel author literature criticism reading text essay",
+    "Music": "music band song album musician rock jazz",
+    "Reference": "dictionary guide reference word entry handbook",
+    "Education": "teacher student classroom education school learning",
+}
+
+COMMON_VOCABULARY = (
+    "world new year time find must begin young old journey dangerous mysterious "
+    "powerful unexpected friend enemy home return truth lie hope fear dream "
+    "night day city village war peace death birth power freedom choice "
+    "question answer stranger family history future memory betrayal courage"
+).split()
+
+
+def _zipf_weights(n, exponent=1.1):
+    """Rank-frequency weights 1/k^s, normalised to sum to one"""
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    return weights / weights.sum()
+
+
+def _author_name_forms(rng, first, last):
+    """Candidate names for one author, from the plainest form to the rarest"""
+    initial, second_initial = rng.choice(INITIALS, size=2)
+    second_last = LAST_NAMES[rng.integers(len(LAST_NAMES))]
+    yield f"{first} {last}"
+    yield f"{first} {initial}. {last}"
+    if second_last != last:
+        yield f"{first} {last}-{second_last}"
+        yield f"{first} {initial}. {last}-{second_last}"
+    yield f"{first} {initial}. {second_initial}. {last}"
+
+
+def _make_authors(rng, n_authors):
+    """
+    Unique author names. A name pair that is already taken gets a middle
+    initial, a double-barrelled surname or two initials, so names never
+    need a numeric suffix.
+    """
+    authors = []
+    seen = set()
+    while len(authors) < n_authors:
+        first = FIRST_NAMES[rng.integers(len(FIRST_NAMES))]
+        last = LAST_NAMES[rng.integers(len(LAST_NAMES))]
+        for name in _author_name_forms(rng, first, last):
+            if name not in seen:
+                seen.add(name)
+                authors.append(name)
+                break
+    return np.array(authors, dtype=object)
+
+
+def surname(author):
+    """Surname part of a generated author name, e.g. 'Le Guin' or 'Smith-Brown'"""
+    tokens = author.split()[1:]
+    while len(tokens) > 1 and tokens[0].endswith('.'):
+        tokens = tokens[1:]
+    return " ".join(tokens)
+
+
+def _books_per_author(rng, n_rows):
+    """Lognormal books-per-author counts, capped, summing to exactly n_rows"""
+    if n_rows <= 0:
+        return np.zeros(0, dtype=int)
+    counts = []
+    total = 0
+    while total < n_rows:
+        batch = rng.lognormal(BOOKS_PER_AUTHOR_MU, BOOKS_PER_AUTHOR_SIGMA, size=max(16, (n_rows - total) // 3))
+        batch = np.clip(np.rint(batch), 1, MAX_BOOKS_PER_AUTHOR).astype(int)
+        counts.extend(batch.tolist())
+        total += int(batch.sum())
+    counts = np.array(counts)
+    cumulative = np.cumsum(counts)
+    n_authors = int(np.searchsorted(cumulative, n_rows)) + 1
+    counts = counts[:n_authors]
+    counts[-1] -= int(cumulative[n_authors - 1]) - n_rows
+    return counts
+
+
+def _make_titles(rng, n_rows):
+    """Unique titles; collisions become numbered books of a series"""
+    adjectives = rng.choice(TITLE_ADJECTIVES, size=n_rows)
+    nouns = rng.choice(TITLE_NOUNS, size=n_rows)
+    second_nouns = rng.choice(TITLE_NOUNS, size=n_rows)
+    patterns = rng.integers(0, 4, size=n_rows)
+    titles = []
+    counts = {}
+    for adjective, noun, second, pattern in zip(adjectives, nouns, second_nouns, patterns):
+        if pattern == 0:
+            title = f"The {adjective} {noun}"
+        elif pattern == 1:
+            title = f"The {noun} of the {adjective} {second}"
+        elif pattern == 2:
+            title = f"{adjective} {noun}"
+        else:
+            title = f"A {noun} for the {second}"
+        count = counts.get(title, 0) + 1
+        counts[title] = count
+        titles.append(title if count == 1 else f"{title} (Book {count})")
+    return np.array(titles, dtype=object)
+
+
+def _make_summaries(rng, categories, n_rows):
+    """Bag-of-words summaries mixing genre words with a shared vocabulary"""
+    genre_words = {c: words.split() for c, words in CATEGORY_VOCABULARY.items()}
+    # Book blurbs are right-skewed: most are short, a few run long.
+    lengths = np.clip(rng.lognormal(mean=3.6, sigma=0.4, size=n_rows), 12, 160).astype(int)
+    genre_share = rng.uniform(0.3, 0.6, size=n_rows)
+    common = np.array(COMMON_VOCABULARY, dtype=object)
+    summaries = []
+    for category, length, share in zip(categories, lengths, genre_share):
+        n_genre = int(length * share)
+        words = list(rng.choice(genre_words[category], size=n_genre))
+        words += list(rng.choice(common, size=length - n_genre))
+        rng.shuffle(words)
+        summaries.append(" ".join(words).capitalize() + ".")
+    return np.array(summaries, dtype=object)
+
+
+def generate_catalog(n_rows, seed=0):
+    """
+    Build a synthetic books dataframe shaped like Dataset/books.csv:
+    1) Lognormal books per author (median two, top authors a few dozen,
+       never more than MAX_BOOKS_PER_AUTHOR)
+    2) Categories drawn with a Zipf skew (Fiction dominates)
+    3) Publication years clustered around the late 1990s
+    4) Unique titles and genre-flavoured summaries
+    The same n_rows and seed always produce the same catalog.
+    """
+    rng = np.random.default_rng(seed)
+
+    counts = _books_per_author(rng, n_rows)
+    authors = _make_authors(rng, len(counts))
+    author_idx = rng.permutation(np.repeat(np.arange(len(counts)), counts))
+
+    category_idx = rng.choice(len(CATEGORIES), size=n_rows, p=_zipf_weights(len(CATEGORIES), 1.3))
+    categories = np.array(CATEGORIES, dtype=object)[category_idx]
+
+    years = np.clip(np.rint(rng.normal(1996, 9, size=n_rows)), 1900, 2022).astype(int)
+    ratings = np.round(np.clip(rng.normal(3.9, 0.6, size=n_rows), 0, 5), 1)
+    isbns = [f"{n:010d}" for n in rng.choice(10**10, size=n_rows, replace=False)]
+
+    books_df = pd.DataFrame({
+        'isbn': isbns,
+        'book_title': _make_titles(rng, n_rows),
+        'book_author': authors[author_idx],
+        'year_of_publication': years,
+        'img_l': [f"{IMAGE_BASE_URL}/images/P/{isbn}.01.LZZZZZZZ.jpg" for isbn in isbns],
+        'Summary': _make_summaries(rng, categories, n_rows),
+        'Category': categories,
+        'average_rating': ratings,
+    })
+    return books_df
+
+
+class LazyCosineSim:
+    """
+    Stand-in for the dense cosine_sim matrix on large catalogs.
+    Indexing a row computes that row's similarities against every book,
+    which is all get_recommendations_by_title needs.
+    """
+
+    def __init__(self, tfidf_matrix):
+        self.tfidf_matrix = tfidf_matrix
+
+    def __getitem__(self, idx):
+        return cosine_similarity(self.tfidf_matrix[idx], self.tfidf_matrix).flatten()
+
+    def __len__(self):
+        return self.tfidf_matrix.shape[0]
+
+
+def _clean_summary(text):
+    """
+    Cheap stand-in for the notebook's NLTK preprocessing. The synthetic
+    summaries have no stopwords or inflections, so only the character
+    cleanup and lowercasing apply, and no corpus download is needed.
+    """
+    return re.sub('[^a-zA-Z\\s]', '', text).lower()
+
+
+def build_model_artifacts(books_df):
+    """
+    Build the same model_data dict the notebook pickles into model.pkl.
+    """
+    books_df = books_df.drop_duplicates(subset='book_title', keep='first').reset_index(drop=True)
+    books_df['processed_summary'] = books_df['Summary'].apply(_clean_summary)
+    books_df['weighted_content'] = (
+        books_df['book_title'] + ' ' + books_df['book_title'] + ' ' +
+        books_df['book_author'] + ' ' + books_df['book_author'] + ' ' +
+        books_df['Category'] + ' ' +
+        books_df['processed_summary']
+    )
+
+    tfidf = TfidfVectorizer(stop_words='english', max_features=5000, ngram_range=(1, 2))
+    tfidf_matrix = tfidf.fit_transform(books_df['weighted_content'])
+
+    if len(books_df) <= DENSE_COSINE_MAX_ROWS:
+        cosine_sim = cosine_similarity(tfidf_matrix, tfidf_matrix)
+    else:
+        cosine_sim = LazyCosineSim(tfidf_matrix)
+
+    indices = pd.Series(books_df.index, index=books_df['book_title']).drop_duplicates()
+
+    return {
+        'tfidf_vectorizer': tfidf,
+        'tfidf_matrix': tfidf_matrix,
+        'cosine_sim': cosine_sim,
+        'indices': indices,
+        'books_df': books_df,
+    }
+
+
+def artifact_path(artifact_dir, n_rows, seed):
+    return os.path.join(artifact_dir, f"model_v{CATALOG_VERSION}_{n_rows}_seed{seed}.pkl")
+
+
+def ensure_model_artifacts(artifact_dir, n_rows, seed=0, rebuild=False):
+    """
+    Return the path of the pickled model for a synthetic catalog,
+    generating and pickling it first if it is not cached on disk yet.
+    """
+    path = artifact_path(artifact_dir, n_rows, seed)
+    if rebuild or not os.path.exists(path):
+        os.makedirs(artifact_dir, exist_ok=True)
+        model_data = build_model_artifacts(generate_catalog(n_rows, seed))
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(model_data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    return path
@@ -0,0 +1,375 @@
+import json
+import logging
+import multiprocessing
+import pickle
+import queue
+import threading
+import time
+import traceback
+import warnings
+from collections import Counter
+from urllib.parse import urlparse
+
+import numpy as np
+
+from benchmark import catalog, run
+from benchmark.stub_server import CoverStubServer
+
+STAGES = ["recommend", "explain", "render_cards", "visualize", "session"]
+
+
+QUERY_TYPES = ['title', 'author', 'keywords']
+
+
+def _session_for_book(rng, book, query_type, filter_rate):
+    """
+    One search seeded from a catalog book. Filters are drawn around that
+    book so they can still match: the year range brackets its publication
+    year, the excluded category is never its own and include_keywords come
+    from its genre vocabulary.
+    """
+    genre_words = catalog.CATEGORY_VOCABULARY.get(book['Category'], " ".join(catalog.COMMON_VOCABULARY)).split()
+    if query_type == 'title':
+        query = book['book_title']
+    elif query_type == 'author':
+        query = catalog.surname(book['book_author'])
+    else:
+        query = " ".join(rng.choice(genre_words, size=3, replace=False))
+
+    entry = {'query': str(query), 'query_type': query_type, 'top_n': 10}
+    if rng.random() < filter_rate:
+        others = [c for c in catalog.CATEGORIES if c != book['Category']]
+        entry['exclude_categories'] = [str(rng.choice(others))]
+    if rng.random() < filter_rate:
+        year = int(book['year_of_publication'])
+        width = int(rng.integers(5, 16))
+        entry['year_range'] = [year - width, year + width]
+    if rng.random() < filter_rate / 4:
+        entry['include_keywords'] = " ".join(rng.choice(genre_words, size=2, replace=False))
+    return entry
+
+
+def make_trace(model_data, n_sessions, seed=0, hot_queries=20, hot_share=0.8, filter_rate=0.5):
+    """
+    A mix of title, author and keyword sessions with the app's optional
+    filters. Like real traffic it is skewed: with probability hot_share a
+    session repeats one of hot_queries popular searches, picked by Zipf
+    rank, so concurrent threads render the same covers and contend on
+    broken_urls. The rest are one-off searches from across the catalog.
+    """
+    rng = np.random.default_rng(seed)
+    books_df = model_data['books_df']
+
+    def random_session():
+        book = books_df.iloc[int(rng.integers(len(books_df)))]
+        return _session_for_book(rng, book, QUERY_TYPES[int(rng.integers(len(QUERY_TYPES)))], filter_rate)
+
+    hot = [random_session() for _ in range(max(0, hot_queries))]
+    popularity = 1.0 / np.arange(1, len(hot) + 1)
+    popularity /= popularity.sum()
+
+    trace = []
+    for _ in range(n_sessions):
+        if hot and rng.random() < hot_share:
+            trace.append(dict(hot[int(rng.choice(len(hot), p=popularity))]))
+        else:
+            trace.append(random_session())
+    return trace
+
+
+def _trace_from_artifact(artifact_path, n_sessions, seed, hot_queries, hot_share, filter_rate):
+    with open(artifact_path, 'rb') as f:
+        model_data = pickle.load(f)
+    return make_trace(model_data, n_sessions, seed=seed, hot_queries=hot_queries,
+                      hot_share=hot_share, filter_rate=filter_rate)
+
+
+def save_trace(trace, path):
+    with open(path, 'w') as f:
+        for entry in trace:
+            f.write(json.dumps(entry) + "\n")
+
+
+def load_trace(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def replay_session(entry, model_data, image_base_url):
+    """
+    Replay one search the way run_recommendation drives it in the app:
+    recommend_books, explain_recommendations, one card per book (each card
+    fetches its cover) and the insight charts. Returns seconds per stage;
+    a search with no recommendations only has a 'recommend' timing.
+    """
+    import utils.util as util
+    import utils.util_model as recommender
+
+    timings = {}
+    start = time.perf_counter()
+    recs = util.recommend_books(model_data, **entry)
+    timings['recommend'] = time.perf_counter() - start
+    if recs is None or recs.empty:
+        return timings
+
+    stage_start = time.perf_counter()
+    query_type = entry['query_type']
+    if query_type == 'title':
+        explained_recs = recommender.explain_recommendations(recs, entry['query'], model_data['books_df'])
+    else:
+        explained_recs = recommender.explain_recommendations(recs)
+    timings['explain'] = time.perf_counter() - stage_start
+
+    # Point cover URLs at the stub server instead of the real CDN
+    explained_recs['img_l'] = explained_recs['img_l'].str.replace(
+        catalog.IMAGE_BASE_URL, image_base_url, regex=False
+    )
+
+    stage_start = time.perf_counter()
+    if query_type == 'author':
+        display_function = util.display_book_card_with_image_for_author
+    else:
+        display_function = util.display_book_card_with_image
+    for _, book in explained_recs.iterrows():
+        display_function(book)
+    timings['render_cards'] = time.perf_counter() - stage_start
+
+    stage_start = time.perf_counter()
+    util.visualize_recommendations(explained_recs, query_type)
+    timings['visualize'] = time.perf_counter() - stage_start
+
+    timings['session'] = time.perf_counter() - start
+    return timings
+
+
+class _BareModeLogFilter(logging.Filter):
+    """Drops streamlit's per-call warnings about running outside `streamlit run`"""
+
+    MESSAGES = ("missing ScriptRunContext", "No runtime found", "to view this Streamlit app")
+
+    def filter(self, record):
+        message = record.getMessage()
+        return not any(text in message for text in self.MESSAGES)
+
+
+def _run_worker(artifact_path, entries, n_threads, image_base_url, sample_interval):
+    """
+    One worker process: load the model, then replay entries from a shared
+    queue on n_threads threads while sampling RSS. The module globals under
+    test (broken_urls, pyplot state) are shared by all threads here.
+    """
+    # seaborn deprecates the palette-without-hue charts on every call; other
+    # warnings (e.g. pyplot's open figure limit) are left visible
+    warnings.filterwarnings('ignore', message=r"\s*Passing `palette` without assigning `hue`",
+                            category=FutureWarning)
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import streamlit  # noqa: F401 -- creates the loggers filtered below
+
+    bare_mode_filter = _BareModeLogFilter()
+    for name in list(logging.root.manager.loggerDict):
+        if name.startswith("streamlit"):
+            logging.getLogger(name).addFilter(bare_mode_filter)
+    import utils.util as util
+
+    with open(artifact_path, 'rb') as f:
+        model_data = pickle.load(f)
+
+    work = queue.Queue()
+    for entry in entries:
+        work.put(entry)
+
+    lock = threading.Lock()
+    latencies = {stage: [] for stage in STAGES}
+    errors = Counter()
+    error_samples = {}
+    completed = [0]
+    empty = [0]
+
+    def replay():
+        while True:
+            try:
+                entry = work.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                timings = replay_session(entry, model_data, image_base_url)
+            except Exception as e:
+                key = f"{type(e).__name__}: {str(e)[:120]}"
+                with lock:
+                    errors[key] += 1
+                    error_samples.setdefault(key, traceback.format_exc(limit=4))
+                continue
+            with lock:
+                if 'session' in timings:
+                    completed[0] += 1
+                else:
+                    empty[0] += 1
+                for stage, seconds in timings.items():
+                    latencies[stage].append(seconds)
+
+    rss_samples = []
+    done = threading.Event()
+
+    def sample_rss():
+        while not done.wait(sample_interval):
+            rss_samples.append(round(run.current_rss_mb(), 1))
+
+    rss_start = run.current_rss_mb()
+    sampler = threading.Thread(target=sample_rss, daemon=True)
+    sampler.start()
+
+    threads = [threading.Thread(target=replay) for _ in range(n_threads)]
+    started_at = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    finished_at = time.time()
+    done.set()
+    sampler.join()
+
+    broken_urls = list(util.broken_urls)
+    return {
+        'started_at': started_at,
+        'finished_at': finished_at,
+        'completed': completed[0],
+        'empty': empty[0],
+        'latencies': latencies,
+        'errors': dict(errors),
+        'error_samples': error_samples,
+        'rss_start_mb': round(rss_start, 1),
+        'rss_end_mb': round(run.current_rss_mb(), 1),
+        'rss_samples_mb': rss_samples,
+        'broken_urls': broken_urls,
+        'open_figures': len(plt.get_fignums()),
+    }
+
+
+def _find_races(workers, stub):
+    """
+    Turn per-process state into findings:
+    1) Duplicate broken_urls entries: two threads both passed the
+       `not in broken_urls` check before either appended
+    2) broken_urls entries the stub served fine: a transient 503 marked a
+       valid cover as broken for the rest of the process lifetime
+    3) Figures left open in pyplot's global figure manager
+    4) Exceptions raised from rendering under concurrency
+    """
+    duplicates = 0
+    total = 0
+    transient = set()
+    for worker in workers:
+        counts = Counter(worker['broken_urls'])
+        total += len(worker['broken_urls'])
+        duplicates += sum(count - 1 for count in counts.values())
+        transient.update(url for url in counts if stub.kind(urlparse(url).path) == 'cover')
+
+    errors = Counter()
+    for worker in workers:
+        errors.update(worker['errors'])
+
+    return {
+        'broken_urls_entries': total,
+        'broken_urls_duplicate_appends': duplicates,
+        'broken_urls_marked_by_transient_failures': len(transient),
+        'stub_server': stub.stats(),
+        'open_pyplot_figures': sum(worker['open_figures'] for worker in workers),
+        'session_errors': dict(errors.most_common()),
+    }
+
+
+def run_loadtest(n_rows=10000, n_sessions=200, n_processes=1, n_threads=8, seed=0,
+                 trace=None, hot_queries=20, hot_share=0.8, filter_rate=0.5, latency=0.05, jitter=0.02, failure_rate=0.05,
+                 broken_rate=0.1, invalid_rate=0.02, sample_interval=0.5,
+                 artifact_dir=run.DEFAULT_ARTIFACT_DIR, trace_output=None, log=print):
+    """
+    1) Build (or reuse) the synthetic catalog artifact and a session trace
+    2) Start the cover stub server in this process
+    3) Split the trace across n_processes workers of n_threads threads each
+    4) Report throughput, latency percentiles per stage, memory growth and
+       the shared-state races observed
+    """
+    artifact_path, _ = run.in_fresh_process(run.build_artifacts, artifact_dir, n_rows, seed, False)
+    if trace is None:
+        trace = run.in_fresh_process(_trace_from_artifact, artifact_path, n_sessions, seed,
+                                     hot_queries, hot_share, filter_rate)
+    if trace_output:
+        save_trace(trace, trace_output)
+    log(f"Replaying {len(trace)} sessions on {n_processes} x {n_threads} threads...")
+
+    with CoverStubServer(latency=latency, jitter=jitter, failure_rate=failure_rate,
+                         broken_rate=broken_rate, invalid_rate=invalid_rate, seed=seed) as stub:
+        ctx = multiprocessing.get_context("spawn")
+        chunks = [trace[i::n_processes] for i in range(n_processes)]
+        with ctx.Pool(n_processes) as pool:
+            workers = pool.starmap(
+                _run_worker,
+                [(artifact_path, chunk, n_threads, stub.base_url, sample_interval) for chunk in chunks],
+            )
+        races = _find_races(workers, stub)
+
+    wall_s = max(w['finished_at'] for w in workers) - min(w['started_at'] for w in workers)
+    completed = sum(w['completed'] for w in workers)
+    empty = sum(w['empty'] for w in workers)
+    latencies = {
+        stage: run.summarize_latencies(sum((w['latencies'][stage] for w in workers), []))
+        for stage in STAGES
+        if any(w['latencies'][stage] for w in workers)
+    }
+
+    return {
+        'meta': run.run_metadata(
+            seed=seed, n_rows=n_rows, n_processes=n_processes, n_threads=n_threads,
+            trace={'hot_queries': hot_queries, 'hot_share': hot_share, 'filter_rate': filter_rate},
+            stub={'latency': latency, 'jitter': jitter, 'failure_rate': failure_rate,
+                  'broken_rate': broken_rate, 'invalid_rate': invalid_rate},
+        ),
+        'sessions': len(trace),
+        'completed': completed,
+        'empty': empty,
+        'failed': len(trace) - completed - empty,
+        'wall_s': round(wall_s, 3),
+        'throughput_per_s': round(completed / wall_s, 2) if wall_s else None,
+        'latency': latencies,
+        'memory': [
+            {
+                'rss_start_mb': w['rss_start_mb'],
+                'rss_end_mb': w['rss_end_mb'],
+                'growth_mb': round(w['rss_end_mb'] - w['rss_start_mb'], 1),
+                'samples_mb': w['rss_samples_mb'],
+            }
+            for w in workers
+        ],
+        'races': races,
+        'error_samples': {k: v for w in workers for k, v in w['error_samples'].items()},
+    }
+
+
+def format_report(report):
+    lines = [
+        f"{report['completed']}/{report['sessions']} sessions in {report['wall_s']:.1f}s "
+        f"({report['throughput_per_s']} sessions/s), {report['empty']} without results, "
+        f"{report['failed']} failed",
+    ]
+    for stage, stats in report['latency'].items():
+        lines.append(
+            f"  {stage:<14} p50 {stats['p50_ms']:>10.2f} ms  "
+            f"p95 {stats['p95_ms']:>10.2f} ms  p99 {stats['p99_ms']:>10.2f} ms"
+        )
+    for i, memory in enumerate(report['memory']):
+        lines.append(
+            f"  process {i}: RSS {memory['rss_start_mb']:.0f} -> {memory['rss_end_mb']:.0f} MB "
+            f"({memory['growth_mb']:+.0f} MB)"
+        )
+    races = report['races']
+    lines.append(
+        f"  broken_urls: {races['broken_urls_entries']} entries, "
+        f"{races['broken_urls_duplicate_appends']} duplicate appends, "
+        f"{races['broken_urls_marked_by_transient_failures']} marked by transient failures"
+    )
+    lines.append(f"  open pyplot figures: {races['open_pyplot_figures']}")
+    for error, count in races['session_errors'].items():
+        lines.append(f"  {count:>5} x {error}")
+    return "\n".join(lines)
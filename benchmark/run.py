@@ -0,0 +1,320 @@
+import json
+import multiprocessing
+import os
+import pickle
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from benchmark import catalog
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_ARTIFACT_DIR = os.path.join(BENCHMARK_DIR, "artifacts")
+DEFAULT_RESULTS_DIR = os.path.join(BENCHMARK_DIR, "results")
+DEFAULT_SIZES = [10000, 100000, 1000000]
+
+PATHS = [
+    "get_recommendations_by_title",
+    "get_recommendations_by_author",
+    "search_books_by_content",
+    "explain_recommendations",
+    "recommend_books",
+]
+
+
+def peak_rss_mb():
+    """Peak resident set size of the current process in MB"""
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    if sys.platform == "darwin":
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def current_rss_mb():
+    """Current resident set size in MB, falling back to the peak off Linux"""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return peak_rss_mb()
+
+
+def summarize_latencies(latencies):
+    """p50/p95/p99 and mean of a list of durations in seconds, as milliseconds"""
+    ms = np.asarray(latencies) * 1000
+    return {
+        'n': int(len(ms)),
+        'mean_ms': round(float(ms.mean()), 3),
+        'p50_ms': round(float(np.percentile(ms, 50)), 3),
+        'p95_ms': round(float(np.percentile(ms, 95)), 3),
+        'p99_ms': round(float(np.percentile(ms, 99)), 3),
+    }
+
+
+def make_queries(model_data, n_queries, seed=0):
+    """
+    Sample reproducible queries from the catalog:
+    1) Titles that exist in the index
+    2) Author last names, the way users type partial names
+    3) Keyword triples from a genre vocabulary
+    4) Mixed recommend_books calls with the app's optional filters
+    """
+    rng = np.random.default_rng(seed)
+    books_df = model_data['books_df']
+    titles = model_data['indices'].index.to_numpy()
+
+    title_queries = list(rng.choice(titles, size=n_queries))
+    authors = books_df['book_author'].to_numpy()[rng.integers(0, len(books_df), size=n_queries)]
+    author_queries = [catalog.surname(name) for name in authors]
+
+    vocab = list(catalog.CATEGORY_VOCABULARY.values())
+    keyword_queries = []
+    for _ in range(n_queries):
+        words = vocab[rng.integers(0, len(vocab))].split()
+        keyword_queries.append(" ".join(rng.choice(words, size=3, replace=False)))
+
+    query_types = ['title', 'author', 'keywords']
+    mixed_queries = []
+    for i in range(n_queries):
+        query_type = query_types[i % 3]
+        query = {'title': title_queries, 'author': author_queries, 'keywords': keyword_queries}[query_type][i]
+        kwargs = {'query': query, 'query_type': query_type, 'top_n': 10}
+        if rng.random() < 0.5:
+            kwargs['exclude_categories'] = [str(rng.choice(catalog.CATEGORIES))]
+        if rng.random() < 0.5:
+            low = int(rng.integers(1950, 2000))
+            kwargs['year_range'] = (low, low + int(rng.integers(5, 30)))
+        if rng.random() < 0.2:
+            kwargs['include_keywords'] = keyword_queries[(i + 1) % n_queries]
+        mixed_queries.append(kwargs)
+
+    return {
+        'title': title_queries,
+        'author': author_queries,
+        'keywords': keyword_queries,
+        'mixed': mixed_queries,
+    }
+
+
+def _time_calls(func, args_list, warmup):
+    for args in args_list[:warmup]:
+        func(*args)
+    latencies = []
+    for args in args_list:
+        start = time.perf_counter()
+        func(*args)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def build_artifacts(artifact_dir, n_rows, seed, rebuild):
+    start = time.perf_counter()
+    path = catalog.ensure_model_artifacts(artifact_dir, n_rows, seed=seed, rebuild=rebuild)
+    return path, time.perf_counter() - start
+
+
+def _benchmark_artifact(path, n_queries, warmup, seed):
+    """Load one pickled model and time every retrieval path against it"""
+    import utils.util as util
+    import utils.util_model as recommender
+
+    start = time.perf_counter()
+    with open(path, 'rb') as f:
+        model_data = pickle.load(f)
+    load_s = time.perf_counter() - start
+    rss_after_load = current_rss_mb()
+
+    tfidf = model_data['tfidf_vectorizer']
+    tfidf_matrix = model_data['tfidf_matrix']
+    cosine_sim = model_data['cosine_sim']
+    indices = model_data['indices']
+    books_df = model_data['books_df']
+    queries = make_queries(model_data, n_queries, seed=seed)
+
+    title_recs = {}
+
+    def by_title(title):
+        title_recs[title] = recommender.get_recommendations_by_title(title, cosine_sim, books_df, indices, top_n=20)
+
+    def explain(title):
+        recommender.explain_recommendations(title_recs[title], title, books_df)
+
+    calls = {
+        "get_recommendations_by_title": (by_title, [(q,) for q in queries['title']]),
+        "get_recommendations_by_author": (
+            lambda author: recommender.get_recommendations_by_author(author, books_df, top_n=20),
+            [(q,) for q in queries['author']],
+        ),
+        "search_books_by_content": (
+            lambda keywords: recommender.search_books_by_content(keywords, tfidf, tfidf_matrix, books_df, top_n=20),
+            [(q,) for q in queries['keywords']],
+        ),
+        # Reuses the title results above, as the app does after a title search
+        "explain_recommendations": (explain, [(q,) for q in queries['title']]),
+        "recommend_books": (
+            lambda kwargs: util.recommend_books(model_data, **kwargs),
+            [(q,) for q in queries['mixed']],
+        ),
+    }
+
+    paths = {}
+    for name in PATHS:
+        func, args_list = calls[name]
+        rss_before = current_rss_mb()
+        stats = summarize_latencies(_time_calls(func, args_list, warmup))
+        stats['rss_growth_mb'] = round(current_rss_mb() - rss_before, 1)
+        paths[name] = stats
+
+    return {
+        'n_books': int(len(books_df)),
+        'dense_cosine_sim': not isinstance(cosine_sim, catalog.LazyCosineSim),
+        'artifact_load_s': round(load_s, 3),
+        'rss_after_load_mb': round(rss_after_load, 1),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'paths': paths,
+    }
+
+
+def in_fresh_process(func, *args):
+    """Run func in a new interpreter so peak RSS is measured per catalog size"""
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(1) as pool:
+        return pool.apply(func, args)
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=BENCHMARK_DIR,
+            capture_output=True, text=True, check=True,
+        )
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _package_versions():
+    versions = {}
+    for name in ["numpy", "pandas", "sklearn", "scipy"]:
+        try:
+            versions[name] = __import__(name).__version__
+        except ImportError:
+            versions[name] = None
+    return versions
+
+
+def run_benchmarks(sizes=None, n_queries=100, warmup=3, seed=0,
+                   artifact_dir=DEFAULT_ARTIFACT_DIR, rebuild=False, log=print):
+    """
+    1) Generate and pickle a synthetic catalog per size (cached on disk)
+    2) Load each artifact in a fresh process and time every retrieval path
+    3) Return a JSON-serialisable report
+    """
+    sizes = sizes or DEFAULT_SIZES
+    results = []
+    for n_rows in sizes:
+        log(f"[{n_rows} rows] building artifacts...")
+        path, build_s = in_fresh_process(build_artifacts, artifact_dir, n_rows, seed, rebuild)
+        log(f"[{n_rows} rows] benchmarking {os.path.basename(path)}...")
+        result = in_fresh_process(_benchmark_artifact, path, n_queries, warmup, seed)
+        result['n_rows'] = n_rows
+        result['artifact_build_s'] = round(build_s, 3)
+        result['artifact_size_mb'] = round(os.path.getsize(path) / (1024 * 1024), 1)
+        results.append(result)
+
+    return {
+        'meta': run_metadata(seed=seed, n_queries=n_queries, warmup=warmup),
+        'results': results,
+    }
+
+
+def run_metadata(**extra):
+    meta = {
+        'commit': _git_commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'packages': _package_versions(),
+        'catalog_version': catalog.CATALOG_VERSION,
+    }
+    meta.update(extra)
+    return meta
+
+
+def save_report(report, output=None, results_dir=DEFAULT_RESULTS_DIR, prefix=""):
+    if output is None:
+        os.makedirs(results_dir, exist_ok=True)
+        commit = (report['meta']['commit'] or "nocommit")[:10]
+        stamp = report['meta']['timestamp'].replace(":", "").replace("-", "")[:15]
+        output = os.path.join(results_dir, f"{prefix}{stamp}_{commit}.json")
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    return output
+
+
+def format_report(report):
+    lines = []
+    for result in report['results']:
+        lines.append(
+            f"{result['n_rows']} rows ({result['n_books']} books): "
+            f"load {result['artifact_load_s']:.2f}s, peak RSS {result['peak_rss_mb']:.0f} MB"
+        )
+        for name in PATHS:
+            stats = result['paths'][name]
+            lines.append(
+                f"  {name:<32} p50 {stats['p50_ms']:>10.2f} ms  "
+                f"p95 {stats['p95_ms']:>10.2f} ms  p99 {stats['p99_ms']:>10.2f} ms"
+            )
+    return "\n".join(lines)
+
+
+def compare_reports(base, head, threshold=0.10):
+    """
+    Pair up results by catalog size and path and report the relative change
+    of each latency percentile. Changes above threshold are regressions.
+    Sizes or paths missing from either report are skipped. Reports built
+    from different catalog versions time different data, so they raise.
+    """
+    base_version = base['meta'].get('catalog_version')
+    head_version = head['meta'].get('catalog_version')
+    if base_version != head_version:
+        raise ValueError(
+            f"Reports use different synthetic catalogs (version {base_version} vs "
+            f"{head_version}); rerun the base commit's benchmark with the same catalog"
+        )
+
+    base_by_size = {r['n_rows']: r for r in base['results']}
+    rows = []
+    for head_result in head['results']:
+        base_result = base_by_size.get(head_result['n_rows'])
+        if base_result is None:
+            continue
+        metrics = [('artifact_load_s', base_result['artifact_load_s'], head_result['artifact_load_s']),
+                   ('peak_rss_mb', base_result['peak_rss_mb'], head_result['peak_rss_mb'])]
+        for name in PATHS:
+            if name not in base_result['paths'] or name not in head_result['paths']:
+                continue
+            for pct in ['p50_ms', 'p95_ms', 'p99_ms']:
+                metrics.append((f"{name}.{pct}", base_result['paths'][name][pct], head_result['paths'][name][pct]))
+        for metric, old, new in metrics:
+            if old:
+                change = (new - old) / old
+            else:
+                change = 0.0 if new == old else float('inf')
+            rows.append({
+                'n_rows': head_result['n_rows'],
+                'metric': metric,
+                'base': old,
+                'head': new,
+                'change': round(change, 4),
+                'regression': change > threshold,
+            })
+    return rows
@@ -0,0 +1,132 @@
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+
+from PIL import Image
+
+
+def _png_bytes(width, height):
+    buffer = BytesIO()
+    Image.new("RGB", (width, height), (30, 58, 138)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+COVER_PNG = _png_bytes(150, 200)
+# Amazon serves a 1x1 image for missing covers, which is_valid_image rejects
+PLACEHOLDER_PNG = _png_bytes(1, 1)
+NOT_AN_IMAGE = b"<html><body>Not Found</body></html>"
+
+
+class CoverStubServer:
+    """
+    Local stand-in for the cover image CDN.
+    Every response is delayed by latency +/- jitter seconds. Each URL is
+    permanently broken (1x1 image) with probability broken_rate or not an
+    image with probability invalid_rate, decided by a hash of the path so
+    it is stable across requests. Independently of that, any request fails
+    with HTTP 503 with probability failure_rate.
+    """
+
+    def __init__(self, latency=0.05, jitter=0.0, failure_rate=0.0,
+                 broken_rate=0.0, invalid_rate=0.0, seed=0, host="127.0.0.1", port=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.broken_rate = broken_rate
+        self.invalid_rate = invalid_rate
+        self.seed = seed
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.failures = 0
+        self.broken_paths = set()
+        self.invalid_paths = set()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server._handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def kind(self, path):
+        """Stable per-URL outcome: 'cover', 'broken' or 'invalid'"""
+        bucket = (zlib.crc32(f"{self.seed}:{path}".encode()) % 10000) / 10000
+        if bucket < self.broken_rate:
+            return 'broken'
+        if bucket < self.broken_rate + self.invalid_rate:
+            return 'invalid'
+        return 'cover'
+
+    def _handle(self, handler):
+        with self._lock:
+            self.requests += 1
+            delay = max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter))
+            failed = self._rng.random() < self.failure_rate
+            if failed:
+                self.failures += 1
+        time.sleep(delay)
+
+        if failed:
+            handler.send_response(503)
+            handler.end_headers()
+            return
+
+        kind = self.kind(handler.path)
+        if kind == 'broken':
+            with self._lock:
+                self.broken_paths.add(handler.path)
+            body, content_type = PLACEHOLDER_PNG, "image/png"
+        elif kind == 'invalid':
+            with self._lock:
+                self.invalid_paths.add(handler.path)
+            body, content_type = NOT_AN_IMAGE, "text/html"
+        else:
+            body, content_type = COVER_PNG, "image/png"
+
+        handler.send_response(200)
+        handler.send_header("Content-Type", content_type)
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'failures': self.failures,
+                'broken_urls_served': len(self.broken_paths),
+                'invalid_urls_served': len(self.invalid_paths),
+            }
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        # shutdown() waits for serve_forever, so only call it once started
+        if self._thread is not None:
+            self._httpd.shutdown()
+            self._thread = None
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmark import catalog, run
+
+
+@pytest.mark.parametrize("n_rows", [1, 7, 1000, 54321])
+def test_books_per_author_sums_to_n_rows(n_rows):
+    counts = catalog._books_per_author(np.random.default_rng(0), n_rows)
+    assert counts.sum() == n_rows
+    assert counts.min() >= 1
+    assert counts.max() <= catalog.MAX_BOOKS_PER_AUTHOR
+
+
+def test_books_per_author_respects_cap():
+    catalog_mu = catalog.BOOKS_PER_AUTHOR_MU
+    try:
+        # Push the lognormal far above the cap so clipping is exercised
+        catalog.BOOKS_PER_AUTHOR_MU = 8.0
+        counts = catalog._books_per_author(np.random.default_rng(0), 20000)
+    finally:
+        catalog.BOOKS_PER_AUTHOR_MU = catalog_mu
+    assert counts.sum() == 20000
+    assert counts[:-1].max() == catalog.MAX_BOOKS_PER_AUTHOR
+
+
+@pytest.mark.parametrize("n_rows", [0, -5])
+def test_books_per_author_without_rows(n_rows):
+    assert len(catalog._books_per_author(np.random.default_rng(0), n_rows)) == 0
+
+
+def test_generate_empty_catalog():
+    books_df = catalog.generate_catalog(0)
+    assert books_df.empty
+    assert 'book_author' in books_df.columns
+
+
+@pytest.mark.parametrize("author, expected", [
+    ("Ursula Le Guin", "Le Guin"),
+    ("Mary K. Smith", "Smith"),
+    ("Mary A. B. Smith", "Smith"),
+    ("Walter Allen-Smith", "Allen-Smith"),
+    ("Mark W. Taylor-Graham", "Taylor-Graham"),
+])
+def test_surname(author, expected):
+    assert catalog.surname(author) == expected
+
+
+def test_generated_authors_have_no_digits():
+    books_df = catalog.generate_catalog(20000, seed=0)
+    assert not books_df['book_author'].str.contains(r'\d').any()
+    assert books_df['book_author'].value_counts().iloc[0] <= catalog.MAX_BOOKS_PER_AUTHOR
+
+
+def test_generate_catalog_is_reproducible():
+    pd.testing.assert_frame_equal(catalog.generate_catalog(500, seed=4), catalog.generate_catalog(500, seed=4))
+    assert not catalog.generate_catalog(500, seed=4).equals(catalog.generate_catalog(500, seed=5))
+
+
+def test_artifact_path_includes_catalog_version(tmp_path):
+    path = catalog.artifact_path(str(tmp_path), 1000, 3)
+    assert f"v{catalog.CATALOG_VERSION}" in path
+
+
+def _report(version=catalog.CATALOG_VERSION, results=None):
+    return {'meta': {'catalog_version': version}, 'results': results or []}
+
+
+def _result(n_rows, p50=10.0, load_s=1.0, peak_rss_mb=100.0, paths=None):
+    paths = paths if paths is not None else run.PATHS
+    return {
+        'n_rows': n_rows,
+        'artifact_load_s': load_s,
+        'peak_rss_mb': peak_rss_mb,
+        'paths': {name: {'p50_ms': p50, 'p95_ms': p50, 'p99_ms': p50} for name in paths},
+    }
+
+
+def _rows_by_metric(rows):
+    return {(row['n_rows'], row['metric']): row for row in rows}
+
+
+def test_compare_reports_threshold():
+    base = _report(results=[_result(1000, p50=10.0)])
+    head = _report(results=[_result(1000, p50=11.5)])
+    rows = _rows_by_metric(run.compare_reports(base, head, threshold=0.10))
+    row = rows[(1000, "recommend_books.p50_ms")]
+    assert row['change'] == pytest.approx(0.15)
+    assert row['regression']
+    assert not rows[(1000, "artifact_load_s")]['regression']
+
+    rows = _rows_by_metric(run.compare_reports(base, head, threshold=0.20))
+    assert not rows[(1000, "recommend_books.p50_ms")]['regression']
+
+
+def test_compare_reports_zero_base():
+    base = _report(results=[_result(1000, load_s=0.0, peak_rss_mb=0.0)])
+    head = _report(results=[_result(1000, load_s=0.5, peak_rss_mb=0.0)])
+    rows = _rows_by_metric(run.compare_reports(base, head))
+    assert rows[(1000, "artifact_load_s")]['change'] == float('inf')
+    assert rows[(1000, "artifact_load_s")]['regression']
+    assert rows[(1000, "peak_rss_mb")]['change'] == 0.0
+    assert not rows[(1000, "peak_rss_mb")]['regression']
+
+
+def test_compare_reports_skips_missing_sizes_and_paths():
+    base = _report(results=[_result(1000, paths=["search_books_by_content"]), _result(5000)])
+    head = _report(results=[_result(1000), _result(20000)])
+    rows = run.compare_reports(base, head)
+    assert {row['n_rows'] for row in rows} == {1000}
+    assert {row['metric'].split('.')[0] for row in rows} == {
+        "artifact_load_s", "peak_rss_mb", "search_books_by_content",
+    }
+
+
+def test_compare_reports_refuses_different_catalog_versions():
+    base = _report(version=1, results=[_result(1000)])
+    head = _report(results=[_result(1000)])
+    with pytest.raises(ValueError, match="different synthetic catalogs"):
+        run.compare_reports(base, head)
+    with pytest.raises(ValueError):
+        run.compare_reports({'meta': {}, 'results': []}, head)
@@ -0,0 +1,156 @@
+import json
+from collections import Counter
+from io import BytesIO
+
+import pytest
+import requests
+from PIL import Image
+
+from benchmark import catalog, loadtest
+from benchmark.stub_server import CoverStubServer
+
+
+@pytest.fixture
+def stub():
+    server = CoverStubServer(latency=0, broken_rate=0.2, invalid_rate=0.1, seed=3)
+    yield server
+    server.stop()
+
+
+def _paths_of_kind(stub, kind, n):
+    paths = (f"/images/P/{i:010d}.01.LZZZZZZZ.jpg" for i in range(100000))
+    return [path for path in paths if stub.kind(path) == kind][:n]
+
+
+def _worker(broken_urls, errors=None, open_figures=0):
+    return {'broken_urls': broken_urls, 'errors': errors or {}, 'open_figures': open_figures}
+
+
+def test_kind_is_stable_per_path(stub):
+    paths = [f"/covers/{i}.jpg" for i in range(200)]
+    assert [stub.kind(p) for p in paths] == [stub.kind(p) for p in paths]
+
+
+def test_kind_respects_rates(stub):
+    kinds = [stub.kind(f"/covers/{i}.jpg") for i in range(20000)]
+    assert kinds.count('broken') / len(kinds) == pytest.approx(0.2, abs=0.02)
+    assert kinds.count('invalid') / len(kinds) == pytest.approx(0.1, abs=0.02)
+    assert kinds.count('cover') / len(kinds) == pytest.approx(0.7, abs=0.02)
+
+
+def test_kind_with_zero_and_full_rates():
+    clean = CoverStubServer()
+    broken = CoverStubServer(broken_rate=1.0)
+    try:
+        paths = [f"/covers/{i}.jpg" for i in range(500)]
+        assert {clean.kind(p) for p in paths} == {'cover'}
+        assert {broken.kind(p) for p in paths} == {'broken'}
+    finally:
+        clean.stop()
+        broken.stop()
+
+
+def test_stub_serves_each_kind(stub):
+    stub.start()
+    broken_path, = _paths_of_kind(stub, 'broken', 1)
+    invalid_path, = _paths_of_kind(stub, 'invalid', 1)
+    cover_path, = _paths_of_kind(stub, 'cover', 1)
+
+    assert Image.open(BytesIO(requests.get(stub.base_url + cover_path).content)).size == (150, 200)
+    assert Image.open(BytesIO(requests.get(stub.base_url + broken_path).content)).size == (1, 1)
+    assert requests.get(stub.base_url + invalid_path).headers['Content-Type'] == "text/html"
+    assert stub.stats() == {'requests': 3, 'failures': 0, 'broken_urls_served': 1, 'invalid_urls_served': 1}
+
+
+def test_stub_failure_rate():
+    server = CoverStubServer(latency=0, failure_rate=1.0).start()
+    try:
+        assert requests.get(server.base_url + "/covers/1.jpg").status_code == 503
+        assert server.stats()['failures'] == 1
+    finally:
+        server.stop()
+
+
+def test_find_races_counts_duplicate_appends_per_process(stub):
+    a, b = (stub.base_url + path for path in _paths_of_kind(stub, 'broken', 2))
+    workers = [
+        _worker([a, a, a, b]),
+        # The same URL in another process has its own broken_urls list
+        _worker([a, b]),
+    ]
+    races = loadtest._find_races(workers, stub)
+    assert races['broken_urls_entries'] == 6
+    assert races['broken_urls_duplicate_appends'] == 2
+    assert races['broken_urls_marked_by_transient_failures'] == 0
+
+
+def test_find_races_classifies_transient_failures(stub):
+    cover_a, cover_b = (stub.base_url + path for path in _paths_of_kind(stub, 'cover', 2))
+    broken, = (stub.base_url + path for path in _paths_of_kind(stub, 'broken', 1))
+    invalid, = (stub.base_url + path for path in _paths_of_kind(stub, 'invalid', 1))
+    workers = [
+        _worker([cover_a, broken, invalid]),
+        _worker([cover_a, cover_b]),
+    ]
+    races = loadtest._find_races(workers, stub)
+    # A valid cover only lands in broken_urls after a 503; counted once across processes
+    assert races['broken_urls_marked_by_transient_failures'] == 2
+    assert races['broken_urls_duplicate_appends'] == 0
+
+
+def test_find_races_merges_errors_and_figures(stub):
+    workers = [
+        _worker([], errors={"ValueError: x": 2}, open_figures=21),
+        _worker([], errors={"ValueError: x": 1, "KeyError: 'y'": 1}, open_figures=4),
+    ]
+    races = loadtest._find_races(workers, stub)
+    assert races['open_pyplot_figures'] == 25
+    assert races['session_errors'] == {"ValueError: x": 3, "KeyError: 'y'": 1}
+
+
+def test_replay_session_without_results_only_times_recommend():
+    model_data = catalog.build_model_artifacts(catalog.generate_catalog(300, seed=1))
+    entry = {'query': "qqqq zzzz", 'query_type': 'keywords', 'top_n': 5}
+    timings = loadtest.replay_session(entry, model_data, "http://127.0.0.1:9")
+    assert list(timings) == ['recommend']
+
+
+@pytest.fixture(scope="module")
+def model_data():
+    return catalog.build_model_artifacts(catalog.generate_catalog(1500, seed=2))
+
+
+def test_make_trace_repeats_hot_queries(model_data):
+    trace = loadtest.make_trace(model_data, 400, seed=1, hot_queries=10, hot_share=0.8)
+    counts = Counter(json.dumps(entry, sort_keys=True) for entry in trace)
+    assert len(counts) < 150
+    # Zipf rank 1 of 10 gets about a third of the hot traffic
+    assert counts.most_common(1)[0][1] > 60
+
+
+def test_make_trace_without_hot_queries_is_spread_out(model_data):
+    trace = loadtest.make_trace(model_data, 200, seed=1, hot_queries=0)
+    assert len({json.dumps(entry, sort_keys=True) for entry in trace}) > 190
+
+
+def test_make_trace_filters_can_match(model_data):
+    books_df = model_data['books_df']
+    trace = loadtest.make_trace(model_data, 300, seed=3, hot_queries=0, filter_rate=1.0)
+    for entry in trace:
+        low, high = entry['year_range']
+        assert 10 <= high - low <= 30
+        if entry['query_type'] == 'title':
+            book = books_df[books_df['book_title'] == entry['query']].iloc[0]
+            assert low <= book['year_of_publication'] <= high
+            assert book['Category'] not in entry['exclude_categories']
+    assert json.loads(json.dumps(trace)) == trace
+
+
+def test_make_trace_sessions_mostly_return_results(model_data):
+    import utils.util as util
+    trace = loadtest.make_trace(model_data, 150, seed=4, hot_queries=0, filter_rate=0.5)
+    empty = 0
+    for entry in trace:
+        recs = util.recommend_books(model_data, **entry)
+        empty += recs is None or recs.empty
+    assert empty / len(trace) < 0.05